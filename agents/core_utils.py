@@ -1,37 +1,189 @@
-from agents.schemas import InferredItemCodes
-from datetime import datetime, timezone
+from agents.schemas import InferredItemCodes, BatchItemSummary, get_tenk_item_descriptions
+from agents.llm_cache import LLMCache
 from typing_extensions import TypedDict, NotRequired, List
 from pydantic import BaseModel, Field
-from collections.abc import Iterable
 from finnhub import Client
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional
 import os
-from edgar.core import set_identity
-from edgar.company_reports import TenK
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+import openai
 from langchain_openai import ChatOpenAI
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+import numpy as np
 import pandas as pd
 
-def summarize_item_text(item_code: str, title:str, description: str, item_text: str)-> str: 
-    prompt = (
-        f"You are a financial analyst assistant. Read the following text from {title} ({item_code}) "
-        "of a 10-K filing. Extract and populate the following structured format:\n\n"
-        f"{description}\n\n"
-        "- Write a short summary (max 100 words).\n"
-        "- Remember to include key numerical data \n"
-        f"TEXT:\n{item_text}"
+LLM_MODEL = "gpt-4o"
+_llm_cache = LLMCache()
+
+@functools.lru_cache(maxsize=8)
+def get_llm(model: str = LLM_MODEL, **kwargs) -> ChatOpenAI:
+    """
+    Returns a shared ChatOpenAI client for the given model and settings,
+    so that its HTTP connection pool is reused across calls.
+    """
+    return ChatOpenAI(model=model, **kwargs)
+
+# Only transport-level failures are retried; strict schema mode guarantees well-formed output
+TRANSIENT_LLM_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+@functools.lru_cache(maxsize=8)
+def get_structured_llm(schema: type[BaseModel]):
+    """
+    Returns a shared LLM bound to `schema` using OpenAI's strict JSON schema mode,
+    retried with exponential backoff on transient API errors.
+    """
+    # SDK-level retries are disabled so with_retry is the only retry/backoff layer
+    structured_llm = get_llm(temperature=0, max_retries=0).with_structured_output(schema, method="json_schema", strict=True)
+    return structured_llm.with_retry(
+        retry_if_exception_type=TRANSIENT_LLM_ERRORS,
+        wait_exponential_jitter=True,
+        stop_after_attempt=3,
     )
-    
-    llm = ChatOpenAI(model="gpt-4o")
 
-    response = llm.invoke(prompt)
-    llmgen_summary = response.content
+# Static instructions go first so that OpenAI's automatic prompt caching can reuse the prefix
+SUMMARY_SYSTEM_PREFIX = (
+    "You are a financial analyst assistant. You will be given the text of one item of a 10-K filing. "
+    "Extract and populate the structured format described below.\n"
+    "- Write a short summary (max 100 words).\n"
+    "- Remember to include key numerical data \n"
+)
+
+def build_summary_messages(item_code: str, title: str, description: str, item_text: str) -> list[BaseMessage]:
+    system_prompt = (
+        f"{SUMMARY_SYSTEM_PREFIX}\n"
+        f"Item: {title} ({item_code})\n"
+        f"Structured format:\n{description}"
+    )
+    return [SystemMessage(content=system_prompt), HumanMessage(content=f"TEXT:\n{item_text}")]
+
+def summarize_item_text(item_code: str, title:str, description: str, item_text: str)-> str: 
+    messages = build_summary_messages(item_code, title, description, item_text)
+
+    cache_key = LLMCache.make_key(LLM_MODEL, [m.content for m in messages])
+    cached_summary = _llm_cache.get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
+
+    llm = get_llm(temperature=0)
+
+    # Stream so tokens are consumed as they are generated
+    llmgen_summary = "".join(chunk.content for chunk in llm.stream(messages))
+    _llm_cache.set(cache_key, llmgen_summary)
     return llmgen_summary 
 
+async def asummarize_item_text(item_code: str, title:str, description: str, item_text: str)-> str: 
+    messages = build_summary_messages(item_code, title, description, item_text)
+
+    cache_key = LLMCache.make_key(LLM_MODEL, [m.content for m in messages])
+    cached_summary = _llm_cache.get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
+
+    llm = get_llm(temperature=0)
+
+    chunks = []
+    async for chunk in llm.astream(messages):
+        chunks.append(chunk.content)
+    llmgen_summary = "".join(chunks)
+    _llm_cache.set(cache_key, llmgen_summary)
+    return llmgen_summary 
+
+# Above this many input tokens, items are summarized one call per item instead of in one batch
+BATCH_SUMMARY_MAX_TOKENS = 80_000
+
+BATCH_SUMMARY_SYSTEM_PREFIX = (
+    "You are a financial analyst assistant. You will be given the text of several items of a 10-K filing, "
+    "each delimited by an '=== <item code>: <title> ===' header. For each item, extract and populate "
+    "the structured format listed for it below.\n"
+    "- Write a short summary (max 100 words) per item.\n"
+    "- Remember to include key numerical data \n"
+    "- Return exactly one summary per item, in the order given, with its item code.\n"
+)
+
+def build_batch_summary_messages(items: List[tuple]) -> list[BaseMessage]:
+    formats = "\n\n".join(
+        f"Item: {title} ({item_code})\nStructured format:\n{description}"
+        for item_code, title, description, _ in items
+    )
+    texts = "\n\n".join(
+        f"=== {item_code}: {title} ===\nTEXT:\n{item_text}"
+        for item_code, title, _, item_text in items
+    )
+    return [SystemMessage(content=f"{BATCH_SUMMARY_SYSTEM_PREFIX}\n{formats}"), HumanMessage(content=texts)]
+
+async def asummarize_items(items: List[tuple]) -> List[str]:
+    """
+    Async per-item summaries, for callers already running inside an event loop.
+    """
+    return await asyncio.gather(*(asummarize_item_text(*item) for item in items))
+
+def summarize_items_concurrently(items: List[tuple], max_workers: int = 8) -> List[str]:
+    """
+    Summarizes each (item_code, title, description, item_text) tuple with its own LLM call, run in
+    a thread pool. Used from sync code instead of asyncio.run, because langchain_openai's
+    process-wide async HTTP client cannot be reused across the fresh event loops asyncio.run creates.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda item: summarize_item_text(*item), items))
+
+def summarize_items(items: List[tuple]) -> List[str]:
+    """
+    Summarizes several (item_code, title, description, item_text) tuples, returning one summary per item in order.
+
+    All items are sent in a single structured-output LLM call. A single item is summarized
+    directly; falls back to concurrent per-item calls when the combined input would exceed
+    BATCH_SUMMARY_MAX_TOKENS, or for any item missing from the batch response.
+    """
+    if len(items) == 1:
+        return [summarize_item_text(*items[0])]
+    if not items:
+        return []
+
+    messages = build_batch_summary_messages(items)
+    contents = [m.content for m in messages]
+    if get_llm(temperature=0).get_num_tokens("\n".join(contents)) > BATCH_SUMMARY_MAX_TOKENS:
+        return summarize_items_concurrently(items)
+
+    cache_key = LLMCache.make_key(LLM_MODEL, contents, BatchItemSummary.__name__)
+    summaries = _llm_cache.get(cache_key)
+    if summaries is None:
+        response = get_structured_llm(BatchItemSummary).invoke(messages)
+        summaries = {s.item_code: s.summary for s in response.summaries}
+
+        missing = [item for item in items if item[0] not in summaries]
+        if missing:
+            summaries.update(zip((item[0] for item in missing), summarize_items_concurrently(missing)))
+        _llm_cache.set(cache_key, summaries)
+    return [summaries[item_code] for item_code, _, _, _ in items]
+
+@functools.lru_cache(maxsize=1)
 def get_finnhub_client() -> Client:
+    """
+    Returns a process-wide Finnhub client so that its HTTP session (and keep-alive
+    connections) is shared across tool calls, including concurrent peer-comparison fetches.
+    """
     api_key = os.getenv("FINNHUB_API_KEY")
     if not api_key:
         raise ValueError("Environment variable FINNHUB_API_KEY is not set")
-    return Client(api_key=api_key)
+    client = Client(api_key=api_key)
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+    client._session.mount("https://", adapter)
+    return client
+
+# Caps how many SEC fetches run at once, e.g. during the peer-comparison fan-out. Each fetch makes several
+# EDGAR requests; pacing those against the SEC 10 req/s limit is left to edgartools' own request throttling.
+# Only taken on cache misses, since the slots are acquired inside the cached fetch functions.
+SEC_MAX_CONCURRENT_FETCHES = 2
+sec_fetch_slots = threading.BoundedSemaphore(SEC_MAX_CONCURRENT_FETCHES)
+
+# set_identity is global to edgar, so it only needs to run once per process
+_sec_inited = False
+_sec_init_lock = threading.Lock()
 
 def set_sec_client():
     """
@@ -39,8 +191,13 @@ def set_sec_client():
 
     Identity (email) is fetched from the SEC_IDENTITY environment variable.
     """
-    email = os.getenv("SEC_IDENTITY", "default@example.com")
-    set_identity(email)
+    global _sec_inited
+    with _sec_init_lock:
+        if not _sec_inited:
+            from edgar.core import set_identity
+            email = os.getenv("SEC_IDENTITY", "default@example.com")
+            set_identity(email)
+            _sec_inited = True
     # You can optionally return a client or None if set_identity is global
     return True
 
@@ -51,13 +208,19 @@ def ensure_list(item):
     - If input is a string → wraps it in a list.
     - If input is a non-iterable → wraps it in a list.
     - If input is an iterable (excluding string/bytes) → converts it to a list.
+    - If input is already a list → returned as is (no copy).
     """
     if item is None:
         return []
-    if isinstance(item, str) or not isinstance(item, Iterable):
+    if isinstance(item, list):
+        return item
+    if isinstance(item, (str, bytes)):
         return [item]
+    # Duck-typed check; avoids the slower collections.abc.Iterable isinstance machinery
+    if hasattr(item, '__iter__'):
+        return list(item)
     
-    return list(item)
+    return [item]
 
 def convert_unix_to_datetime(timestamp: int) -> str:
     """
@@ -72,52 +235,109 @@ def convert_unix_to_datetime(timestamp: int) -> str:
     Example:
         convert_unix_to_datetime(1747771200)  # → '2025-05-20 20:00:00'
     """
-    dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-    return dt.strftime('%Y-%m-%d %H:%M:%S UTC')
+    t = time.gmtime(timestamp)
+    return f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} {t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d} UTC"
 
 def format_peer_comparison_prompt(peer_data: Dict[str, Any]) -> str:
-    prompt = "Compare the following companies across:\n"
-    prompt += "- Revenue\n- Cost Structure\n- Profitability\n- Leverage\n- Stock and Valuation\n\n"
-    prompt += "Here is the raw data:\n"
+    parts = [
+        "Compare the following companies across:\n",
+        "- Revenue\n- Cost Structure\n- Profitability\n- Leverage\n- Stock and Valuation\n\n",
+        "Here is the raw data:\n",
+    ]
 
     for ticker, data in peer_data.items():
-        prompt += f"\n### {ticker} ###\n"
+        parts.append(f"\n### {ticker} ###\n")
         if "error" in data:
-            prompt += f"Error: {data['error']}\n"
+            parts.append(f"Error: {data['error']}\n")
             continue
-        prompt += f"Income Statement: {data['income_statement']}\n"
-        prompt += f"Balance Sheet: {data['balance_sheet']}\n"
-        prompt += f"Stock Price: {data['stock_price']}\n"
-        prompt += f"Analyst Rating: {data['analyst_rating']}\n"
-        prompt += f"Earnings: {data['earnings']}\n"
-
-    prompt += "\nPlease provide a concise peer comparison."
-    return prompt
-
-def infer_relevant_items(query: str, item_map: dict[str, str]) -> list[str]:
-    item_list_str = "\n".join([f"{code}: {desc}" for code, desc in item_map.items()])
-    prompt = (
-        f"You are a smart assistant that maps user questions to relevant items from a 10-K filing.\n\n"
-        f"Question: \"{query}\"\n\n"
-        f"Choose one or more relevant items from the list below based on the topic of the question.\n"
-        f"Format your output as InferredItemCodes(item_codes=[...])\n\n"
-        f"Available Items:\n{item_list_str}"
-    )
-    llm = ChatOpenAI(model="gpt-4o")
-    structured_llm =llm.with_structured_output(InferredItemCodes)
-    response = structured_llm.invoke(prompt)
+        parts.extend([
+            f"Income Statement: {data['income_statement']}\n",
+            f"Balance Sheet: {data['balance_sheet']}\n",
+            f"Stock Price: {data['stock_price']}\n",
+            f"Analyst Rating: {data['analyst_rating']}\n",
+            f"Earnings: {data['earnings']}\n",
+        ])
+
+    parts.append("\nPlease provide a concise peer comparison.")
+    return "".join(parts)
+
+INFER_SYSTEM_PREFIX = (
+    "You are a smart assistant that maps user questions to relevant items from a 10-K filing.\n\n"
+    "Choose one or more relevant items from the list below based on the topic of the question.\n"
+    "Format your output as InferredItemCodes(item_codes=[...])\n\n"
+)
+
+def _build_infer_system_prompt(item_map: dict[str, str]) -> str:
+    item_list_str = "\n".join(f"{code}: {desc}" for code, desc in item_map.items())
+    return f"{INFER_SYSTEM_PREFIX}Available Items:\n{item_list_str}"
+
+# The 10-K item list is static, so the full system prompt is built once and stays byte-identical across calls
+@functools.lru_cache(maxsize=1)
+def _get_infer_system_prompt() -> str:
+    return _build_infer_system_prompt(get_tenk_item_descriptions())
+
+def infer_relevant_items(query: str, item_map: Optional[dict[str, str]] = None) -> list[str]:
+    """
+    Maps a user question to the relevant 10-K item codes. Uses all TenK items unless `item_map` is given.
+    """
+    system_prompt = _get_infer_system_prompt() if item_map is None else _build_infer_system_prompt(item_map)
+    messages = [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=f"Question: \"{query}\""),
+    ]
+    cache_key = LLMCache.make_key(LLM_MODEL, [m.content for m in messages], InferredItemCodes.__name__)
+    cached_item_codes = _llm_cache.get(cache_key)
+    if cached_item_codes is not None:
+        return list(cached_item_codes)
+
+    structured_llm = get_structured_llm(InferredItemCodes)
+    response = structured_llm.invoke(messages)
+    _llm_cache.set(cache_key, list(response.item_codes))
     return response.item_codes
 
-def reshape_financial_df(df: pd.DataFrame) -> pd.DataFrame:
-    # Keep 'label' and 'concept' if present
-    id_vars = ['label']
-    if 'concept' in df.columns:
-        id_vars.append('concept')
+def reshape_financial_df(df: pd.DataFrame, include_concept: bool = True) -> pd.DataFrame:
+    """
+    Unpivots a wide financial statement (one column per fiscal date) into long format
+    with columns label, [concept], fiscal_date and amount, sorted by label and fiscal date.
 
-    long_df = df.melt(
-        id_vars=id_vars,
-        var_name="fiscal_date",
-        value_name="amount"
-    )
-    sorted_df = long_df.sort_values(by=["label", "fiscal_date"])
+    The long frame is built directly with numpy rather than `df.melt` to avoid melt's
+    intermediate frames on these small statements. Rows with a missing label or fiscal date
+    sort last, as with `sort_values`.
+    """
+    id_cols = ['label'] + (['concept'] if 'concept' in df.columns else [])
+    value_cols = [c for c in df.columns if c not in id_cols]
+    out_id_cols = id_cols if include_concept else ['label']
+    n_rows, n_vals = len(df), len(value_cols)
+
+    ids = {c: np.repeat(df[c].to_numpy(), n_vals) for c in out_id_cols}
+    fiscal = np.tile(np.asarray(value_cols, dtype=object), n_rows)
+    amount = df[value_cols].to_numpy().ravel()
+    long_df = pd.DataFrame({**ids, 'fiscal_date': fiscal, 'amount': amount})
+
+    # sort_values rather than np.lexsort: lexsort cannot compare NaN with str in object columns
+    sorted_df = long_df.sort_values(by=["label", "fiscal_date"], kind="stable")
     return sorted_df
+
+def to_markdown_table(df: pd.DataFrame) -> str:
+    """
+    Renders a DataFrame as a pipe-style markdown table (no index) without the tabulate dependency.
+
+    The output is not byte-identical to `df.to_markdown(index=False)`:
+    - cells are rendered with `str()`, so floats print in full (210000000000.0) rather than
+      tabulate's `floatfmt="g"` (2.1e+11);
+    - only numeric-dtype columns are right-aligned; object columns (e.g. mixed-type amounts) are
+      left-aligned, and column widths follow the str() values;
+    - missing values (None/NaN) render as empty cells.
+    """
+    cols = [str(c) for c in df.columns]
+    # Format cells explicitly; astype(str) keeps NaN as a float on newer pandas
+    arr = [["" if pd.isna(v) else str(v) for v in row] for row in df.to_numpy(dtype=object).tolist()]
+    widths = [max([len(cols[i])] + [len(row[i]) for row in arr]) for i in range(len(cols))]
+    right = [pd.api.types.is_numeric_dtype(df[c]) for c in df.columns]
+
+    def fmt_row(values) -> str:
+        cells = [v.rjust(w) if r else v.ljust(w) for v, w, r in zip(values, widths, right)]
+        return "| " + " | ".join(cells) + " |"
+
+    sep = "|" + "|".join(("-" * (w + 1) + ":") if r else (":" + "-" * (w + 1)) for w, r in zip(widths, right)) + "|"
+    return "\n".join([fmt_row(cols), sep, *(fmt_row(row) for row in arr)])
@@ -1,12 +1,20 @@
-from agents.core_utils import reshape_financial_df, summarize_item_text, infer_relevant_items, ensure_list, get_finnhub_client, convert_unix_to_datetime, set_sec_client
-from agents.schemas import get_tenk_items, get_tenk_item_descriptions
-from edgar import *
-from edgar.xbrl.stitching import XBRLS
+from agents.core_utils import reshape_financial_df, summarize_items, infer_relevant_items, get_finnhub_client, convert_unix_to_datetime, to_markdown_table, sec_fetch_slots
+from agents.schemas import get_tenk_items
+from agents.response_cache import cache, FILING_TTL, DAILY_TTL, QUOTE_TTL
+from agents.metadata_tools import get_latest_accession_numbers, fetch_filings_by_accession
+import functools
 import pandas as pd
-from typing import Literal
+from typing import Literal, List, Optional
 from langchain.tools import Tool
-from langchain_community.tools.yahoo_finance_news import YahooFinanceNewsTool
-from langchain_community.tools.tavily_search import TavilySearchResults
+
+# langchain_community is slow to import, so its tools are imported inside the functions that use them.
+# edgar is imported explicitly where needed instead of via `from edgar import *`; this saves no load time,
+# since agents.schemas imports edgar (and reads TenK.structure) at import.
+
+@functools.cache
+def _get_yahoo_news_tool():
+    from langchain_community.tools.yahoo_finance_news import YahooFinanceNewsTool
+    return YahooFinanceNewsTool()
 
 def web_search(query: str, num_results: int = 3) -> str:
     """
@@ -19,6 +27,8 @@ def web_search(query: str, num_results: int = 3) -> str:
     Returns:
         str: Combined snippets from top search results.
     """
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
     search = TavilySearchResults(max_results=num_results)
     results = search.run(query)
     return results
@@ -30,7 +40,7 @@ def get_yahoo_news() -> Tool:
     """
     return Tool(
         name="yahoo_finance_news",
-        func=YahooFinanceNewsTool().run,
+        func=lambda query: _get_yahoo_news_tool().run(query),
         description=(
             "Fetch recent **stock price-related news** headlines from Yahoo Finance for a given company or stock ticker. "
             "This tool focuses specifically on stock price movement related updates "
@@ -62,8 +72,7 @@ def get_latest_10K_item_summary(user_query: str, ticker:str, item_codes: Optiona
      
     # Case 1: item_code not specified — infer it from the user_query
     if item_codes is None:
-        item_map = get_tenk_item_descriptions()
-        relevant_items = infer_relevant_items(user_query, item_map)
+        relevant_items = infer_relevant_items(user_query)
         item_codes = relevant_items
     else:
         # Case 2: item_code specified — validate it
@@ -73,22 +82,37 @@ def get_latest_10K_item_summary(user_query: str, ticker:str, item_codes: Optiona
             raise ValueError(f"Invalid item codes: {invalid_items}. Must be one of: {sorted(allowed_items)}")
     
     # start processing. We have item_codes, ticker and num_last_10k_filings 
-    form_type = "10-K"
-    filing = get_latest_filings(ticker, form_type, n=1, as_text=False)
-    filing = filing[0]
-    tenk = filing.obj()
-    filing_text = f"\n\n--- Filing: {filing.filing_date} ---\n"
-    for item_code in item_codes:
-        tenk_item = tenk.structure.get_item(item_code)
-        title = tenk_item["Title"]
-        description = tenk_item["Description"]
-        item_txt = str(tenk[item_code])
-        
-        summarized_item_text = summarize_item_text(item_code, title, description, item_txt)
+    accession_numbers = get_latest_accession_numbers(ticker, "10-K", 1)
+    if not accession_numbers:
+        raise ValueError(f"No 10-K filings found for {ticker}")
+    filing_date, items = _get_10K_items(ticker, accession_numbers[0], tuple(item_codes))
+    filing_text = f"\n\n--- Filing: {filing_date} ---\n"
+
+    # Summarize all items in one LLM call (or concurrently per item for very long inputs)
+    summarized_item_texts = summarize_items(items)
+    for (item_code, title, _, _), summarized_item_text in zip(items, summarized_item_texts):
         filing_text += f"\n === Summary of {item_code}: {title} ===\n{summarized_item_text}"
             
     return filing_text.strip()
 
+@cache.memoize(expire=FILING_TTL)
+def _get_10K_items(ticker: str, accession_number: str, item_codes: tuple) -> tuple:
+    """
+    Returns the filing date of the given 10-K and a (item_code, title, description, item_text)
+    tuple for each requested item.
+    """
+    filing = fetch_filings_by_accession(ticker, (accession_number,))[0]
+    items = []
+    with sec_fetch_slots:
+        tenk = filing.obj()
+        for item_code in item_codes:
+            tenk_item = tenk.structure.get_item(item_code)
+            title = tenk_item["Title"]
+            description = tenk_item["Description"]
+            item_txt = str(tenk[item_code])
+            items.append((item_code, title, description, item_txt))
+    return str(filing.filing_date), items
+
 
 def get_financial_statement(
     ticker: str, 
@@ -113,13 +137,19 @@ def get_financial_statement(
     Raises:
         ValueError: If the statement_type is invalid or if no filings/statements are found.
     """
-    set_sec_client()
+    accession_numbers = get_latest_accession_numbers(ticker, form_type, n)
+    if not accession_numbers:
+        raise ValueError(f"No {form_type} filings found for {ticker}")
+    return _get_financial_statement_md(ticker, statement_type, accession_numbers)
+
+@cache.memoize(expire=FILING_TTL)
+def _get_financial_statement_md(ticker: str, statement_type: str, accession_numbers: tuple) -> str:
+    from edgar.xbrl.stitching import XBRLS
 
-    c = Company(ticker)
-    filings = c.get_filings(form=form_type).latest(n)
-    filings = ensure_list(filings)
+    filings = fetch_filings_by_accession(ticker, accession_numbers)
 
-    xbs = XBRLS.from_filings(filings)
+    with sec_fetch_slots:
+        xbs = XBRLS.from_filings(filings)
 
     # Select the statement based on the requested type
     if statement_type == "cashflow":
@@ -132,11 +162,12 @@ def get_financial_statement(
         raise ValueError(f"Unsupported statement type: {statement_type}")
 
     stmnt = stmt.to_dataframe()
-    stmnt_lf = reshape_financial_df(stmnt)
+    stmnt_lf = reshape_financial_df(stmnt, include_concept=False)
     stmnt_lf = stmnt_lf[["label", "fiscal_date", "amount"]]
-    stmnt_lf_md = stmnt_lf.to_markdown(index=False)
+    stmnt_lf_md = to_markdown_table(stmnt_lf)
     return stmnt_lf_md
 
+@cache.memoize(expire=DAILY_TTL)
 def get_earnings(ticker: str, n: int=1):
     """
     Retrieve the most recent quarterly earnings per share (EPS) data for a given company ticker.
@@ -163,6 +194,7 @@ def get_earnings(ticker: str, n: int=1):
     earnings_items = finnhub_client.company_earnings(ticker, limit=n)
     return earnings_items
 
+@cache.memoize(expire=DAILY_TTL)
 def get_analyst_rating_summary(ticker: str):
     """
     Retrieve the most recent analyst rating summary for a given company ticker.
@@ -192,6 +224,7 @@ def get_analyst_rating_summary(ticker: str):
     return reco_items
 
 
+@cache.memoize(expire=QUOTE_TTL)
 def get_stock_price(ticker: str):
     """
     Retrieve the latest stock price quote for a given company ticker.
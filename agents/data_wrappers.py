@@ -1,25 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from agents.data_fetch_tools import get_financial_statement, get_stock_price, get_analyst_rating_summary, get_earnings
 
-def gather_peer_data(tickers: List[str]) -> Dict[str, Any]:
+def gather_peer_data(tickers: List[str], max_workers: int = 8) -> Dict[str, Any]:
     peer_data = {}
 
-    for ticker in tickers:
-        try:
-            income = get_financial_statement(ticker, "10-K", "income")
-            balance = get_financial_statement(ticker, "10-K", "balance_sheet")
-            price = get_stock_price(ticker)
-            rating = get_analyst_rating_summary(ticker)
-            earnings = get_earnings(ticker, n=4)
-
-            peer_data[ticker] = {
-                "income_statement": income,
-                "balance_sheet": balance,
-                "stock_price": price,
-                "analyst_rating": rating,
-                "earnings": earnings
+    # Fetch every (ticker, endpoint) pair concurrently; SEC fetches are further capped by core_utils.sec_fetch_slots
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            ticker: {
+                "income_statement": executor.submit(get_financial_statement, ticker, "10-K", "income"),
+                "balance_sheet": executor.submit(get_financial_statement, ticker, "10-K", "balance_sheet"),
+                "stock_price": executor.submit(get_stock_price, ticker),
+                "analyst_rating": executor.submit(get_analyst_rating_summary, ticker),
+                "earnings": executor.submit(get_earnings, ticker, n=4),
             }
-        except Exception as e:
-            peer_data[ticker] = {"error": str(e)}
+            for ticker in tickers
+        }
+
+        for ticker, ticker_futures in futures.items():
+            try:
+                peer_data[ticker] = {key: future.result() for key, future in ticker_futures.items()}
+            except Exception as e:
+                peer_data[ticker] = {"error": str(e)}
 
     return peer_data
\ No newline at end of file
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class LLMCache:
+    """
+    Exact-match cache for LLM responses.
+
+    Entries are keyed on a SHA-256 of the model, prompt and (optional) output schema name,
+    and held in an in-memory LRU. If `directory` is given (or LLM_CACHE_DIR is set), entries
+    are also persisted with `diskcache` so they survive process restarts.
+
+    Args:
+        maxsize (int): Max number of entries kept in memory. Defaults to 256.
+        ttl (int): Time-to-live of an entry in seconds. Defaults to 24h.
+        directory (Optional[str]): Directory for the on-disk store. Defaults to LLM_CACHE_DIR.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: int = 86400, directory: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = directory or os.getenv("LLM_CACHE_DIR")
+        self._disk = None
+        if directory:
+            import diskcache
+            self._disk = diskcache.Cache(directory)
+
+    @staticmethod
+    def make_key(model: str, prompt: Any, schema_name: Optional[str] = None) -> str:
+        payload = {"model": model, "prompt": prompt, "schema": schema_name}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._disk.get(key) if self._disk is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._store_in_memory(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._store_in_memory(key, value)
+        if self._disk is not None:
+            self._disk.set(key, value, expire=self.ttl)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def _store_in_memory(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
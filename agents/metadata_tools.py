@@ -1,6 +1,73 @@
-import requests 
-from agents.core_utils import set_sec_client, ensure_list
-from edgar import *
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+import importlib.util
+import httpx
+from typing import Any, List, Optional
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+from agents.core_utils import set_sec_client, ensure_list, sec_fetch_slots
+from agents.response_cache import cache, DAILY_TTL
+
+YF_SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+YF_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+YF_TIMEOUT = 10.0
+YF_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it
+YF_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Shared keep-alive client so repeated lookups skip the TLS handshake. Built on first use so
+# a client construction problem only affects the ticker search, not every module importing this one.
+@functools.cache
+def _get_yf_client() -> httpx.Client:
+    return httpx.Client(http2=YF_HTTP2, headers=YF_HEADERS, timeout=YF_TIMEOUT, limits=YF_LIMITS)
+
+def _is_retryable(e: BaseException) -> bool:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+_yf_retry = retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=wait_exponential(multiplier=0.5, max=8),
+    stop=stop_after_attempt(4),
+    reraise=True,
+)
+
+@_yf_retry
+def _yf_search(company_name: str) -> httpx.Response:
+    res = _get_yf_client().get(YF_SEARCH_URL, params={"q": company_name})
+    res.raise_for_status()  # Raise HTTPStatusError for bad responses (4xx, 5xx)
+    return res
+
+@_yf_retry
+async def _ayf_search(client: httpx.AsyncClient, company_name: str) -> httpx.Response:
+    res = await client.get(YF_SEARCH_URL, params={"q": company_name})
+    res.raise_for_status()
+    return res
+
+def _parse_yf_search(res: httpx.Response) -> dict:
+    if "application/json" in res.headers.get("Content-Type", ""):
+        data = res.json()
+        #print(data)
+        results = [
+            {
+                "name": q["shortname"],
+                "symbol": q["symbol"],
+                "exchange": q["exchange"]
+            }
+            for q in data.get("quotes", []) 
+            if q.get("quoteType") == "EQUITY"
+        ]
+        return {
+        "success": True,
+        "result": results,
+        "error": None
+        }
+
+    else:
+        raise ValueError(f"Unexpected content type: {res.headers.get('Content-Type')}")
 
 ## Get ticker given company name 
 def get_ticker_given_name(company_name: str):
@@ -13,40 +80,43 @@ def get_ticker_given_name(company_name: str):
             - 'name': The company's short name (str)
             - 'symbol': The stock ticker symbol (str)
     """
-    url = "https://query2.finance.yahoo.com/v1/finance/search"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    params = {"q": company_name}
-
     try:
-        res = requests.get(url, params=params, headers=headers)
-        res.raise_for_status()  # Raise HTTPError for bad responses (4xx, 5xx)
-
-        if "application/json" in res.headers.get("Content-Type", ""):
-            data = res.json()
-            #print(data)
-            results = [
-                {
-                    "name": q["shortname"],
-                    "symbol": q["symbol"],
-                    "exchange": q["exchange"]
-                }
-                for q in data.get("quotes", []) 
-                if q.get("quoteType") == "EQUITY"
-            ]
-            return {
-            "success": True,
-            "result": results,
-            "error": None
-            }
+        res = _yf_search(company_name)
+        return _parse_yf_search(res)
 
-        else:
-            raise ValueError(f"Unexpected content type: {res.headers.get('Content-Type')}")
+    except httpx.HTTPError as e:
+        return {"success": False, "error": f"HTTP error: {e}", "result": None}
+    except ValueError as e:
+        return {"success": False, "error": f"Invalid response: {e}", "result": None}
 
-    except requests.exceptions.RequestException as e:
+async def aget_ticker_given_name(company_name: str, client: Optional[httpx.AsyncClient] = None):
+    """
+    Async variant of get_ticker_given_name. Pass a shared httpx.AsyncClient to multiplex
+    several lookups over the same HTTP/2 connection.
+    """
+    if client is None:
+        async with httpx.AsyncClient(http2=YF_HTTP2, headers=YF_HEADERS, timeout=YF_TIMEOUT, limits=YF_LIMITS) as client:
+            return await aget_ticker_given_name(company_name, client)
+
+    try:
+        res = await _ayf_search(client, company_name)
+        return _parse_yf_search(res)
+
+    except httpx.HTTPError as e:
         return {"success": False, "error": f"HTTP error: {e}", "result": None}
     except ValueError as e:
         return {"success": False, "error": f"Invalid response: {e}", "result": None}
 
+def get_tickers_given_names(company_names: List[str]) -> List[dict]:
+    """
+    Resolves several company names concurrently. Returns one get_ticker_given_name result per name, in order.
+    """
+    async def _resolve_all():
+        async with httpx.AsyncClient(http2=YF_HTTP2, headers=YF_HEADERS, timeout=YF_TIMEOUT, limits=YF_LIMITS) as client:
+            return await asyncio.gather(*(aget_ticker_given_name(name, client) for name in company_names))
+
+    return asyncio.run(_resolve_all())
+
 
 # Get the CIK 
 def get_cik (name: str) -> str:
@@ -59,11 +129,14 @@ def get_cik (name: str) -> str:
     Returns:
         str: The CIK number of the entity (e.g. 'CIK0001730168').
     """
+    from edgar import Company
+
     set_sec_client()
     
     ticker = get_ticker_given_name(name)[0]['symbol']
-    c = Company(ticker)    
-    cik_raw = c.cik
+    with sec_fetch_slots:
+        c = Company(ticker)    
+        cik_raw = c.cik
     print(f"cik_raw={cik_raw} ({type(cik_raw)})")
     cik_formatted = f"CIK{int(cik_raw):010d}"
     return cik_formatted
@@ -82,17 +155,78 @@ def get_latest_filings(ticker: str, form_type: Optional[str] = None, n: int = 5,
     Returns:
         str: A newline-separated string of the latest filings.
     """
+    if as_text:
+        return _get_latest_filings_text(ticker, form_type, n)
+    else: 
+        return _fetch_latest_filings(ticker, form_type, n)
+
+def _fetch_latest_filings(ticker: str, form_type: Optional[str], n: int) -> list:
+    from edgar import Company
+
     set_sec_client()
 
-    c = Company(ticker)
-    
-    if form_type:
-        filings = c.get_filings(form=form_type).latest(n)
-    else:
-        filings = c.get_filings().latest(n)
+    with sec_fetch_slots:
+        c = Company(ticker)
+        
+        if form_type:
+            filings = c.get_filings(form=form_type).latest(n)
+        else:
+            filings = c.get_filings().latest(n)
     
+    return ensure_list(filings)
+
+# Only the text form is cached; Filing objects are fetched fresh
+@cache.memoize(expire=DAILY_TTL)
+def _get_latest_filings_text(ticker: str, form_type: Optional[str], n: int) -> str:
+    filings = _fetch_latest_filings(ticker, form_type, n)
+    return "\n".join(str(f) for f in filings)
+
+# Which filings are the latest changes whenever a new one is filed, so this lookup is only cached for a day.
+# Data parsed from a given filing never changes and can be cached under its accession numbers.
+#
+# On a miss, the Filing objects found by the lookup are kept in-process so that the cache-by-accession
+# fetch that follows does not reload the company's filings from the SEC. A per-key lock makes concurrent
+# misses for the same lookup (e.g. income and balance sheet for one ticker in gather_peer_data) wait for
+# the first one and then hit the cache, instead of each querying the SEC.
+_RECENT_FILINGS_MAX = 64
+_recent_filings: "OrderedDict[str, Any]" = OrderedDict()
+_lookup_locks: dict[tuple, threading.Lock] = {}
+_filings_lock = threading.Lock()
+
+def _remember_filings(filings: list) -> None:
+    with _filings_lock:
+        for f in filings:
+            _recent_filings[f.accession_no] = f
+            _recent_filings.move_to_end(f.accession_no)
+        while len(_recent_filings) > _RECENT_FILINGS_MAX:
+            _recent_filings.popitem(last=False)
+
+def get_latest_accession_numbers(ticker: str, form_type: Optional[str], n: int) -> tuple:
+    key = (ticker, form_type, n)
+    with _filings_lock:
+        lock = _lookup_locks.setdefault(key, threading.Lock())
+    with lock:
+        return _get_latest_accession_numbers(ticker, form_type, n)
+
+@cache.memoize(expire=DAILY_TTL)
+def _get_latest_accession_numbers(ticker: str, form_type: Optional[str], n: int) -> tuple:
+    filings = _fetch_latest_filings(ticker, form_type, n)
+    _remember_filings(filings)
+    return tuple(f.accession_no for f in filings)
+
+def fetch_filings_by_accession(ticker: str, accession_numbers: tuple) -> list:
+    with _filings_lock:
+        recent = [_recent_filings.get(a) for a in accession_numbers]
+    if all(f is not None for f in recent):
+        return recent
+
+    from edgar import Company
+
+    set_sec_client()
+
+    with sec_fetch_slots:
+        c = Company(ticker)
+        filings = c.get_filings(accession_number=list(accession_numbers))
     filings = ensure_list(filings)
-    if as_text:
-        return "\n".join(str(f) for f in filings)
-    else: 
-        return filings
+    _remember_filings(filings)
+    return filings
\ No newline at end of file
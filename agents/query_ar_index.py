@@ -4,7 +4,6 @@ from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from typing import Optional
 from agents.core_utils import infer_relevant_items
-from agents.schemas import get_tenk_item_descriptions
 from agents.config import numCandidates, limit
 
 def query_ar_index(query_text:str, ticker:str, filingdate: Optional[str] = None) -> str:
@@ -41,8 +40,7 @@ def query_ar_index(query_text:str, ticker:str, filingdate: Optional[str] = None)
   embedding = response.data[0].embedding
 
   # Find relevant item(s) from the tenk that should be used 
-  item_map = get_tenk_item_descriptions()
-  relevant_items = infer_relevant_items(query_text, item_map)
+  relevant_items = infer_relevant_items(query_text)
 
   # select the database and collection
   db = client_mongo["filingdb"]
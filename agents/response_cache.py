@@ -0,0 +1,11 @@
+import os
+import diskcache
+
+# On-disk cache for SEC and Finnhub responses, shared across processes
+CACHE_DIR = os.getenv("MAXIT_CACHE_DIR", "/tmp/maxit_cache")
+cache = diskcache.Cache(CACHE_DIR)
+
+# Expiry (in seconds) by how often the underlying data changes
+FILING_TTL = 86400 * 30 # filed 10-K statements and item text do not change
+DAILY_TTL = 86400 # earnings, analyst ratings, filing lists
+QUOTE_TTL = 3600 # stock quotes
@@ -29,9 +29,8 @@ class FilingItemSummary(BaseModel):
 
     @field_validator("item_code")
     def validate_item_code(cls, v):
-        allowed_items = get_tenk_items()
-        if v not in allowed_items:
-            raise ValueError(f"Invalid item_code: {v}. Must be one of: {allowed_items}")
+        if v not in _ALL_TENK_ITEMS:
+            raise ValueError(f"Invalid item_code: {v}. Must be one of: {sorted(_ALL_TENK_ITEMS)}")
         return v
 
 class FilingSummary(BaseModel):
@@ -55,22 +54,30 @@ class LLMGeneratedFilingItemSummary(BaseModel):
 class InferredItemCodes(BaseModel):
     item_codes: List[str] = Field(..., description="List of relevant 10-K item codes like ['ITEM 1A', 'ITEM 7A']")
 
-def get_tenk_items():
-    all_items = []
-    #print(dir(TenK.structure))  
-    all_items = []
-    for part_dict in TenK.structure.structure.values():
-        all_items.extend(part_dict.keys())
-    return all_items
+# Output schema for batched summaries. FilingItemSummary is not reused here: its name is rebound
+# further down this module by an unused class with different fields, and the model only needs to
+# return the code and summary (title/description are already known and would be echoed back as tokens).
+class ItemSummary(BaseModel):
+    item_code: str = Field(..., description="Filing section code like 'ITEM 1A'")
+    summary: str = Field(..., description="Summary of the item extracted from the filing")
+
+class BatchItemSummary(BaseModel):
+    summaries: List[ItemSummary] = Field(..., description="One summary per requested item, in the order given")
+
+# The TenK structure is static for the life of the process, so it is loaded and flattened once at import
+_STRUCTURE = TenK.structure.structure
+_ALL_TENK_ITEMS = frozenset(code for part_dict in _STRUCTURE.values() for code in part_dict.keys())
+_TENK_ITEM_DESCRIPTIONS = {
+    item_code: f"{meta.get('Title', '')}: {meta.get('Description', '')}"
+    for part_dict in _STRUCTURE.values()
+    for item_code, meta in part_dict.items()
+}
+
+def get_tenk_items() -> frozenset[str]:
+    return _ALL_TENK_ITEMS
 
 def get_tenk_item_descriptions() -> dict[str, str]:
-    descriptions = {}
-    for part_dict in TenK.structure.structure.values():
-        for item_code, meta in part_dict.items():
-            title = meta.get("Title", "")
-            desc = meta.get("Description", "")
-            descriptions[item_code] = f"{title}: {desc}"
-    return descriptions
+    return _TENK_ITEM_DESCRIPTIONS
 
 ## START - UNUSED CLASSES 
 class BusinessSection(BaseModel):
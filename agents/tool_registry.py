@@ -16,16 +16,22 @@ _base_tools = [
     get_financial_statement, run_peer_comparison, get_latest_10K_item_summary #query_ar_index,
 ]
 
-def list_tools() -> str:
-    """
-    Lists all tools the assistant can use, based on their docstrings.
-    """
+def _build_tool_descriptions() -> str:
     descriptions = []
     for tool in _base_tools + [list_tools]:
         name = getattr(tool, "__name__", str(tool))
-        doc = getattr(tool, "__doc__", "(No docstring provided)")
+        doc = getattr(tool, "__doc__", None) or "(No docstring provided)"
         descriptions.append(f"**{name}**:\n{doc.strip()}")
     return "\n\n".join(descriptions)
 
+def list_tools() -> str:
+    """
+    Lists all tools the assistant can use, based on their docstrings.
+    """
+    return _TOOL_LIST_STR
+
+# Tool docstrings do not change at runtime, so the listing is built once at import
+_TOOL_LIST_STR = _build_tool_descriptions()
+
 # Final export
 tools: List = _base_tools + [list_tools]
@@ -1,7 +1,6 @@
 from agents.data_wrappers import gather_peer_data
-from agents.core_utils import format_peer_comparison_prompt
-from langchain_openai import ChatOpenAI
-from edgar import *
+from agents.core_utils import format_peer_comparison_prompt, get_llm
+from typing import List
 
 def run_peer_comparison(tickers: List[str]) -> str:
     """
@@ -26,8 +25,9 @@ def run_peer_comparison(tickers: List[str]) -> str:
 
     data = gather_peer_data(tickers)
     prompt = format_peer_comparison_prompt(data)
-    llm = ChatOpenAI(model="gpt-4o")
-    response = llm.invoke(prompt)  # plug in your LLM interface
+    llm = get_llm()
+    # Stream the comparison and assemble it as chunks arrive
+    response = "".join(chunk.content for chunk in llm.stream(prompt))
     return response
 
 
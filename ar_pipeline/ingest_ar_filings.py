@@ -1,4 +1,4 @@
-from agents.data_fetch_tools import get_latest_filings
+from agents.metadata_tools import get_latest_filings
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import os, time
@@ -39,7 +39,7 @@ def generate_filing__item_structured_summary_and_chunks(
         f"TEXT:\n{item_txt}"
     )
 
-    structured_llm = llm.with_structured_output(LLMGeneratedFilingItemSummary)
+    structured_llm = llm.with_structured_output(LLMGeneratedFilingItemSummary, method="json_schema", strict=True)
     llmgen_summary = structured_llm.invoke(prompt)
 
     # Assemble full FilingItemSummary